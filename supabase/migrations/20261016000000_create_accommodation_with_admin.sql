@@ -0,0 +1,31 @@
+-- Signup in one round trip: accommodation, admin membership and initial config
+-- are created in a single transaction. Called with the service role key only.
+create or replace function public.create_accommodation_with_admin(
+    p_name text,
+    p_user uuid,
+    p_config jsonb default '{}'::jsonb
+)
+returns uuid
+language plpgsql
+as $$
+declare
+    aid uuid;
+begin
+    insert into public.accommodations (name)
+    values (p_name)
+    returning id into aid;
+
+    insert into public.memberships (accommodation_id, user_id, role)
+    values (aid, p_user, 'admin');
+
+    insert into public.configs (accommodation_id, config_json)
+    values (aid, coalesce(p_config, '{}'::jsonb))
+    on conflict (accommodation_id) do update set config_json = excluded.config_json;
+
+    return aid;
+end
+$$;
+
+-- p_user is caller-supplied, so regular users must not be able to call this
+revoke execute on function public.create_accommodation_with_admin(text, uuid, jsonb) from public, anon, authenticated;
+grant execute on function public.create_accommodation_with_admin(text, uuid, jsonb) to service_role;
@@ -0,0 +1,35 @@
+-- Indexes for the filters/orderings used by web/db.py.
+
+-- list_tasks / list_tasks_summary: eq(accommodation_id) order by finished_at desc
+create index if not exists tasks_accommodation_finished_at_idx
+    on public.tasks (accommodation_id, finished_at desc);
+
+-- get_config / upsert_config(on_conflict=accommodation_id); the upsert already
+-- relies on a unique constraint here, whatever it is named, so only add an index
+-- when no unique index on exactly (accommodation_id) exists yet
+do $$
+begin
+    if not exists (
+        select 1
+        from pg_index i
+        join pg_attribute a
+          on a.attrelid = i.indrelid and a.attnum = i.indkey[0]
+        where i.indrelid = 'public.configs'::regclass
+          and i.indisunique
+          and i.indnkeyatts = 1
+          and i.indpred is null
+          and a.attname = 'accommodation_id'
+    ) then
+        create unique index configs_accommodation_id_key
+            on public.configs (accommodation_id);
+    end if;
+end
+$$;
+
+-- get_my_membership: eq(user_id)
+create index if not exists memberships_user_id_idx
+    on public.memberships (user_id);
+
+-- list_members / get_profiles_for_accommodation: eq(accommodation_id) order by created_at desc
+create index if not exists memberships_accommodation_created_at_idx
+    on public.memberships (accommodation_id, created_at desc);
@@ -0,0 +1,7 @@
+-- Keyset paging in list_tasks / list_tasks_summary orders by (finished_at desc, id desc)
+-- and filters on (finished_at, id) < cursor; this index covers filter and order.
+create index if not exists tasks_accommodation_finished_at_id_idx
+    on public.tasks (accommodation_id, finished_at desc, id desc);
+
+-- superseded by the index above
+drop index if exists public.tasks_accommodation_finished_at_idx;
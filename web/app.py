@@ -2,19 +2,33 @@
 # (c)d.berger@dontsniff.co.uk
 from __future__ import annotations
 
+import html
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from textwrap import dedent
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
-import pandas as pd
 import streamlit as st
 
 from db import DB
 
+if TYPE_CHECKING:
+    import pandas as pd
+
+st.set_page_config(page_title="ReservoDojo", layout="wide")
+
 APP_DIR = Path(__file__).resolve().parent
 LOGO_PATH = APP_DIR / "assets" / "reservodojo-logo.png"
 
+
+@st.cache_resource(show_spinner=False)
+def _logo_bytes() -> Optional[bytes]:
+    # read once per process instead of a stat + path lookup on every rerun
+    return LOGO_PATH.read_bytes() if LOGO_PATH.exists() else None
+
+
 SUPABASE_URL = st.secrets.get("SUPABASE_URL", "")
 SUPABASE_ANON_KEY = st.secrets.get("SUPABASE_ANON_KEY", "")
 SUPABASE_SERVICE_ROLE_KEY = st.secrets.get("SUPABASE_SERVICE_ROLE_KEY", "")
@@ -23,7 +37,14 @@ if not SUPABASE_URL or not SUPABASE_ANON_KEY:
     st.error("Missing SUPABASE_URL / SUPABASE_ANON_KEY in Streamlit secrets.")
     st.stop()
 
-db = DB(SUPABASE_URL, SUPABASE_ANON_KEY, SUPABASE_SERVICE_ROLE_KEY)
+
+@st.cache_resource(show_spinner=False)
+def _get_db() -> DB:
+    # one DB wrapper per process, shared by all sessions and reruns
+    return DB(SUPABASE_URL, SUPABASE_ANON_KEY, SUPABASE_SERVICE_ROLE_KEY)
+
+
+db = _get_db()
 
 from scenario import (
     generate_scenario,
@@ -60,10 +81,14 @@ def _set_session_from_auth(auth_res) -> None:
     if session is None or user is None:
         raise RuntimeError("Could not read session/user from Supabase auth response.")
 
-    st.session_state["access_token"] = session.access_token
-    st.session_state["refresh_token"] = session.refresh_token
-    st.session_state["user_id"] = user.id
-    st.session_state["user_email"] = user.email
+    st.session_state.update(
+        {
+            "access_token": session.access_token,
+            "refresh_token": session.refresh_token,
+            "user_id": user.id,
+            "user_email": user.email,
+        }
+    )
 
 
 def is_logged_in() -> bool:
@@ -74,8 +99,19 @@ def is_logged_in() -> bool:
     )
 
 
+@st.cache_resource(show_spinner=False, ttl=600, max_entries=256)
+def _build_authed_sb(access_token: str, refresh_token: str):
+    # keyed on the token pair, so a client is never handed to another user;
+    # ttl stays below db.MIN_BIND_TOKEN_SECONDS so a client never outlives its bound token
+    return db.authed_client(access_token, refresh_token)
+
+
 def get_authed_sb():
-    return db.authed_client(st.session_state["access_token"], st.session_state["refresh_token"])
+    """
+    Reuses the authed client (and its HTTP connection pool) across reruns
+    as long as the tokens did not change.
+    """
+    return _build_authed_sb(st.session_state["access_token"], st.session_state["refresh_token"])
 
 
 def require_auth_or_login() -> None:
@@ -89,7 +125,8 @@ def require_auth_or_login() -> None:
 
     try:
         sb = get_authed_sb()
-        sb.auth.get_user()
+        # pass the token explicitly: clients with a directly bound token hold no GoTrue session
+        sb.auth.get_user(st.session_state["access_token"])
     except Exception:
         st.warning("Your session expired. Please log in again.")
         login_ui()
@@ -116,12 +153,16 @@ def ensure_membership_loaded() -> None:
 
 
 def logout():
-    try:
-        db.sign_out(st.session_state["access_token"], st.session_state["refresh_token"])
-    except Exception:
-        pass
+    access_token = st.session_state.get("access_token")
+    refresh_token = st.session_state.get("refresh_token")
+    if access_token and refresh_token:
+        # don't block the UI on the sign-out round-trip; failures are ignored anyway
+        try:
+            _background_executor().submit(db.sign_out, access_token, refresh_token)
+        except Exception:
+            pass
 
-    for k in [
+    for k in (
         "access_token",
         "refresh_token",
         "user_id",
@@ -139,10 +180,19 @@ def logout():
         "finish_save_message",
         "finish_save_message_type",
         "finish_followup_message",
-    ]:
-        st.session_state.pop(k, None)
-
-    for k in ["guests_editor_df", "roomcats_editor_df"]:
+        "_tasks_cache",
+        "_tasks_prefetch",
+        "_tasks_prefetch_started",
+        "_tasks_prefetch_at",
+        "_review_rows",
+        "_review_shown_ids",
+        "_review_selected_idx",
+        "_review_selected_id",
+        "guests_editor_df",
+        "roomcats_editor_df",
+        "_guests_clean",
+        "_roomcats_clean",
+    ):
         st.session_state.pop(k, None)
 
     st.rerun()
@@ -152,8 +202,9 @@ def login_ui():
     col1, col2 = st.columns([1, 4], vertical_alignment="center")
 
     with col1:
-        if LOGO_PATH.exists():
-            st.image(str(LOGO_PATH), width=150)
+        logo = _logo_bytes()
+        if logo:
+            st.image(logo, width=150)
 
     with col2:
         st.markdown("## ReservoDojo")
@@ -215,33 +266,12 @@ def login_ui():
 
                 sb_admin = db.admin_client()
 
-                acc_res = sb_admin.table("accommodations").insert({"name": accommodation_name.strip()}).execute()
-                if acc_res is None or getattr(acc_res, "error", None):
-                    raise RuntimeError(f"Could not create accommodation: {getattr(acc_res, 'error', None)}")
-                accommodation_id = (acc_res.data or [{}])[0].get("id")
-                if not accommodation_id:
-                    raise RuntimeError("Accommodation created but no id returned.")
-
-                user_id = st.session_state["user_id"]
-                mem_res = (
-                    sb_admin.table("memberships")
-                    .insert({"accommodation_id": accommodation_id, "user_id": user_id, "role": "admin"})
-                    .execute()
-                )
-                if mem_res is None or getattr(mem_res, "error", None):
-                    raise RuntimeError(f"Could not create admin membership: {getattr(mem_res, 'error', None)}")
-
-                cfg0 = default_config()
-                cfg_res = (
-                    sb_admin.table("configs")
-                    .upsert(
-                        {"accommodation_id": accommodation_id, "config_json": cfg0},
-                        on_conflict="accommodation_id",
-                    )
-                    .execute()
+                accommodation_id = db.create_accommodation_with_admin(
+                    sb_admin,
+                    accommodation_name.strip(),
+                    st.session_state["user_id"],
+                    default_config(),
                 )
-                if cfg_res is None or getattr(cfg_res, "error", None):
-                    raise RuntimeError(f"Could not create default config: {getattr(cfg_res, 'error', None)}")
 
                 st.session_state["accommodation_id"] = accommodation_id
                 st.session_state["role"] = "admin"
@@ -256,63 +286,310 @@ def login_ui():
 # -------------------- DB-backed config (per accommodation) --------------------
 
 
+@st.cache_data(ttl=300, show_spinner=False)
+def _cached_get_config(user_id: str, accommodation_id: str) -> Optional[dict]:
+    # st.cache_data hands out copies, so callers may mutate the result freely;
+    # user_id is in the key because the read runs under the caller's JWT (RLS)
+    return db.get_config(get_authed_sb(), accommodation_id)
+
+
 def load_or_init_config() -> dict:
-    sb = get_authed_sb()
     accommodation_id = st.session_state["accommodation_id"]
 
-    cfg = db.get_config(sb, accommodation_id)
+    cfg = _cached_get_config(st.session_state["user_id"], accommodation_id)
     if cfg is None:
         cfg = default_config()
         if st.session_state.get("role") == "admin":
-            db.upsert_config(sb, accommodation_id, cfg)
+            db.upsert_config(get_authed_sb(), accommodation_id, cfg)
+            _cached_get_config.clear()
 
-    return normalize_config(cfg)
+    cfg = normalize_config(cfg)
+    # lets config_editor skip normalizing again on every rerun
+    cfg["_normalized"] = True
+    return cfg
 
 
 def save_config(cfg: dict) -> None:
     sb = get_authed_sb()
     accommodation_id = st.session_state["accommodation_id"]
-    db.upsert_config(sb, accommodation_id, cfg)
+    cfg_to_save = {k: v for k, v in cfg.items() if k != "_normalized"}
+    db.upsert_config(sb, accommodation_id, cfg_to_save)
+    _cached_get_config.clear()
+
+
+# -------------------- DB-backed tasks (per accommodation) --------------------
+
+
+# The task caches fetch under the caller's JWT, so RLS results are keyed by user_id
+# and never served to another user's session.
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_list_tasks_summary(user_id: str, accommodation_id: str, limit: int) -> list[dict]:
+    return db.list_tasks_summary(get_authed_sb(), accommodation_id, limit=limit)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_list_tasks(user_id: str, accommodation_id: str, limit: int) -> list[dict]:
+    return db.list_tasks(get_authed_sb(), accommodation_id, limit=limit)
+
+
+@st.cache_data(ttl=600, show_spinner=False)
+def _cached_get_task(user_id: str, task_id: str) -> Optional[dict]:
+    return db.get_task(get_authed_sb(), task_id)
+
+
+def invalidate_task_caches() -> None:
+    _cached_list_tasks.clear()
+    _cached_list_tasks_summary.clear()
+    _cached_get_task.clear()
+    st.session_state.pop("_review_rows", None)
+
+
+def remember_inserted_task(row: Optional[dict]) -> None:
+    """
+    Keeps a task inserted in this session in the same shape as list_tasks_summary,
+    so the Review list shows it without re-querying Supabase.
+    """
+    if not row or not row.get("id"):
+        return
+    sc = row.get("scenario_json") or {}
+    summary = {k: row.get(k) for k in ("id", "generated_id", "booking_number", "followup_text", "finished_at", "review_status", "created_by")}
+    summary["guest_name"] = sc.get("Guest name", "")
+    summary["room_category"] = sc.get("Room category", "")
+    st.session_state.setdefault("_tasks_cache", []).insert(0, summary)
+
+
+@st.cache_resource(show_spinner=False)
+def _background_executor() -> ThreadPoolExecutor:
+    # shared by all sessions for fire-and-forget / prefetch Supabase calls
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="background")
+
+
+def prefetch_review_tasks(accommodation_id: str, limit: int = 50) -> None:
+    """
+    Starts loading the Review list in the background once per session, so the
+    first visit to Review does not wait for Supabase.
+    The worker thread has no Streamlit context, so it gets the client passed in.
+    """
+    if st.session_state.get("_tasks_prefetch_started"):
+        return
+    st.session_state["_tasks_prefetch_started"] = True
+    st.session_state["_tasks_prefetch_at"] = time.monotonic()
+    st.session_state["_tasks_prefetch"] = _background_executor().submit(
+        db.list_tasks_summary, get_authed_sb(), accommodation_id, limit
+    )
+
+
+# same lifetime as _cached_list_tasks_summary
+REVIEW_ROWS_TTL = 60
+
+
+def _take_prefetched_review_rows() -> Optional[tuple[float, list[dict]]]:
+    """
+    (fetched_at, rows) from the session-start prefetch, or None if it is older than
+    REVIEW_ROWS_TTL, failed, or still queued behind other sessions' background work
+    (then it is cancelled and the caller queries directly instead of waiting).
+    """
+    future = st.session_state.pop("_tasks_prefetch", None)
+    submitted_at = st.session_state.pop("_tasks_prefetch_at", 0.0)
+    if future is None:
+        return None
+    if future.cancel() or time.monotonic() - submitted_at >= REVIEW_ROWS_TTL:
+        return None
+    try:
+        return submitted_at, future.result(timeout=10)
+    except Exception:
+        return None
+
+
+def list_review_tasks(accommodation_id: str, limit: int = 50) -> list[dict]:
+    """
+    The Review list for this session. The rows are kept in session_state for
+    REVIEW_ROWS_TTL, so fragment reruns (row clicks) see the same list that was shown.
+    """
+    now = time.monotonic()
+    snapshot = _take_prefetched_review_rows()
+    if snapshot is None:
+        snapshot = st.session_state.get("_review_rows")
+        if snapshot is None or now - snapshot[0] >= REVIEW_ROWS_TTL:
+            snapshot = (now, _cached_list_tasks_summary(st.session_state["user_id"], accommodation_id, limit))
+    st.session_state["_review_rows"] = snapshot
+    rows = snapshot[1]
+
+    known_ids = {r.get("id") for r in rows}
+    recent = [r for r in st.session_state.get("_tasks_cache", []) if r.get("id") not in known_ids]
+    st.session_state["_tasks_cache"] = recent
+    if not recent:
+        return rows
+    merged = sorted(recent + rows, key=lambda r: str(r.get("finished_at") or ""), reverse=True)
+    return merged[:limit]
 
 
 # -------------------- Config editor helpers --------------------
 
 
-def _ensure_df(value, columns: list[str], empty_row: dict) -> pd.DataFrame:
+GUEST_DTYPES = {"full_name": "string", "comment": "string", "min_guests": "Int64", "max_guests": "Int64"}
+ROOMCAT_DTYPES = {"name": "string", "min_guests": "Int64", "max_guests": "Int64", "category_extras": "string"}
+
+
+def _coerce_int(values: pd.Series) -> pd.Series:
+    """Int64 series: non-numbers and inf become <NA>, fractions are truncated like int()."""
+    import numpy as np
+    import pandas as pd
+    num = pd.to_numeric(values, errors="coerce").astype("float64")
+    return np.trunc(num.mask(np.isinf(num))).astype("Int64")
+
+
+def _apply_dtypes(df: pd.DataFrame, dtypes: dict) -> pd.DataFrame:
+    # numeric columns are coerced first so bad input becomes <NA> instead of raising
+    for col, dtype in dtypes.items():
+        if dtype == "Int64":
+            df[col] = _coerce_int(df[col])
+    return df.astype(dtypes)
+
+
+def _ensure_df(value, columns: list[str], empty_row: dict, dtypes: Optional[dict] = None) -> pd.DataFrame:
+    import pandas as pd
     if isinstance(value, pd.DataFrame):
-        df = value.copy()
-    elif isinstance(value, list):
-        df = pd.DataFrame(value)
+        df = value.reindex(columns=columns)
     elif isinstance(value, dict):
-        df = pd.DataFrame(value)
+        df = pd.DataFrame(value).reindex(columns=columns)
+    elif isinstance(value, list) and value:
+        df = pd.DataFrame.from_records(value, columns=columns)
     else:
-        df = pd.DataFrame([])
+        df = pd.DataFrame(columns=columns)
 
     if df.empty:
-        df = pd.DataFrame([empty_row])
+        df = pd.DataFrame.from_records([empty_row], columns=columns)
 
-    for c in columns:
-        if c not in df.columns:
-            df[c] = None
-    df = df.reindex(columns=columns)
+    if dtypes:
+        df = _apply_dtypes(df, dtypes)
     return df
 
 
 def _apply_row_defaults(df: pd.DataFrame, key_col: str, defaults: dict) -> pd.DataFrame:
+    import numpy as np
     out = df.copy()
     if key_col not in out.columns:
         out[key_col] = ""
 
-    key_has_value = out[key_col].fillna("").astype(str).str.strip().ne("")
+    # one pass over the key column's values, then one vectorized mask per default column
+    key_vals = out[key_col].to_numpy(dtype=object, na_value="")
+    key_has_value = np.fromiter((bool(str(v).strip()) for v in key_vals), dtype=bool, count=len(key_vals))
 
     for col, default_value in defaults.items():
         if col not in out.columns:
             out[col] = None
-        out.loc[key_has_value & out[col].isna(), col] = default_value
+        out[col] = out[col].mask(key_has_value & out[col].isna().to_numpy(), default_value)
 
     return out
 
 
+def _df_content_key(df: pd.DataFrame) -> bytes:
+    import pandas as pd
+    values = pd.util.hash_pandas_object(df, index=False).values.tobytes()
+    return "|".join(map(str, df.columns)).encode() + values
+
+
+def _clean_guests_df(df: pd.DataFrame) -> pd.DataFrame:
+    out = _apply_row_defaults(df, "full_name", {"min_guests": 1, "max_guests": 99})
+    out["full_name"] = out["full_name"].fillna("").astype("string").str.strip()
+
+    if "comment" not in out.columns:
+        out["comment"] = ""
+    out["comment"] = out["comment"].fillna("").astype("string")
+
+    out["min_guests"] = _coerce_int(out["min_guests"]).fillna(1)
+    out["max_guests"] = _coerce_int(out["max_guests"]).fillna(99)
+
+    return out[out["full_name"] != ""].reset_index(drop=True)
+
+
+def _clean_roomcats_df(df: pd.DataFrame) -> pd.DataFrame:
+    out = _apply_row_defaults(df, "name", {"min_guests": 1, "max_guests": 99})
+    out["name"] = out["name"].fillna("").astype("string").str.strip()
+    out["min_guests"] = _coerce_int(out["min_guests"]).fillna(1)
+    out["max_guests"] = _coerce_int(out["max_guests"]).fillna(99)
+
+    if "category_extras" not in out.columns:
+        out["category_extras"] = ""
+    out["category_extras"] = out["category_extras"].fillna("").astype("string")
+
+    return out[out["name"] != ""].reset_index(drop=True)
+
+
+def _init_textarea_state(key: str, items: list[str]) -> None:
+    # join once when the text area first appears instead of on every rerun
+    if key not in st.session_state:
+        st.session_state[key] = "\n".join(items)
+
+
+def _nonempty_lines(txt: str) -> list[str]:
+    # strip and filter in one pass; "\r" left by pasted CRLF text is removed by strip()
+    return [s for s in (line.strip() for line in txt.split("\n")) if s]
+
+
+VALIDATED_CFG_KEYS = (
+    "booking_window",
+    "stay_length_nights",
+    "max_services",
+    "follow_up_probability",
+    "guests",
+    "room_categories",
+)
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _cached_validate_config(cfg_key: str) -> list[str]:
+    return validate_config(json.loads(cfg_key))
+
+
+def _validate_config_if_changed(cfg: dict) -> list[str]:
+    """
+    validate_config only looks at VALIDATED_CFG_KEYS; it is memoized on a
+    JSON dump of those sections, so reruns that changed nothing reuse the result.
+    """
+    cfg_key = json.dumps({k: cfg.get(k) for k in VALIDATED_CFG_KEYS}, sort_keys=True, default=str)
+    return _cached_validate_config(cfg_key)
+
+
+def _df_to_records(df: pd.DataFrame) -> list[dict]:
+    # to_json runs in pandas' C encoder and yields JSON-native values for Supabase
+    return json.loads(df.to_json(orient="records"))
+
+
+_GRID_TMPL = (
+    '<div style="display:grid; grid-template-columns: 180px 1fr; row-gap:4px; '
+    'column-gap:10px; line-height:1.25;">{cells}</div>'
+)
+_GRID_ROW_TMPL = (
+    '<div style="{shade}padding:4px;"><strong>{label}</strong></div>'
+    '<div style="{shade}padding:4px;">{value}</div>'
+)
+_GRID_SHADE = "background:rgba(0,0,0,0.03); "
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def _detail_grid_html(pairs: tuple[tuple[str, str], ...]) -> str:
+    return _GRID_TMPL.format(
+        cells="".join(
+            _GRID_ROW_TMPL.format(
+                shade=_GRID_SHADE if i % 2 else "",
+                label=html.escape(label),
+                value=html.escape(value),
+            )
+            for i, (label, value) in enumerate(pairs)
+        )
+    )
+
+
+def render_detail_grid(pairs: list[tuple[str, object]]) -> None:
+    """Label/value pairs as one HTML grid (every second row shaded) in a single element."""
+    key = tuple((label, str(value) if value is not None else "") for label, value in pairs)
+    st.markdown(_detail_grid_html(key), unsafe_allow_html=True)
+
+
 def perfect_icon(count: int) -> str:
     if count >= 3:
         return "🏆"
@@ -424,12 +701,14 @@ def build_training_progress_rows(cfg: dict, rows: list[dict]) -> list[dict]:
 
 
 def config_editor(cfg: dict) -> tuple[dict, bool]:
-    cfg = normalize_config(cfg)
+    if not cfg.get("_normalized"):
+        cfg = normalize_config(cfg)
+        cfg["_normalized"] = True
     tabs = st.tabs(["General", "Guest profiles", "Room types", "Requests & follow-ups", "Breakfast"])
 
     with tabs[0]:
-        bw = dict(cfg.get("booking_window", {}))
-        stay = dict(cfg.get("stay_length_nights", {}))
+        bw = cfg.setdefault("booking_window", {})
+        stay = cfg.setdefault("stay_length_nights", {})
 
         col1, col2 = st.columns(2)
         with col1:
@@ -449,9 +728,6 @@ def config_editor(cfg: dict) -> tuple[dict, bool]:
             pct = st.slider("Follow-up chance (%)", 0, 100, pct)
             cfg["follow_up_probability"] = pct / 100.0
 
-        cfg["booking_window"] = bw
-        cfg["stay_length_nights"] = stay
-
     with tabs[1]:
         st.caption("Add/edit guests. Changes are included when you click **Save config**.")
 
@@ -463,6 +739,7 @@ def config_editor(cfg: dict) -> tuple[dict, bool]:
                 base,
                 columns=["full_name", "comment", "min_guests", "max_guests"],
                 empty_row={"full_name": "", "comment": "", "min_guests": 1, "max_guests": 99},
+                dtypes=GUEST_DTYPES,
             )
 
         edited = st.data_editor(
@@ -478,20 +755,16 @@ def config_editor(cfg: dict) -> tuple[dict, bool]:
             },
         )
 
-        edited = _apply_row_defaults(edited, "full_name", {"min_guests": 1, "max_guests": 99})
-        edited["full_name"] = edited["full_name"].fillna("").astype(str).str.strip()
-
-        if "comment" not in edited.columns:
-            edited["comment"] = ""
-        edited["comment"] = edited["comment"].fillna("").astype(str)
+        # skip the pandas cleanup entirely when the editor output did not change
+        edited_key = _df_content_key(edited)
+        if st.session_state.get("_guests_clean") != edited_key:
+            edited = _clean_guests_df(edited)
+            st.session_state["_guests_clean"] = edited_key
 
-        edited["min_guests"] = pd.to_numeric(edited["min_guests"], errors="coerce").fillna(1).astype(int)
-        edited["max_guests"] = pd.to_numeric(edited["max_guests"], errors="coerce").fillna(99).astype(int)
-
-        edited = edited[edited["full_name"] != ""].reset_index(drop=True)
-
-        st.session_state[GUESTS_KEY] = edited
-        cfg["guests"] = edited.to_dict(orient="records")
+            # cfg already holds these rows unless the editor actually changed something
+            if not edited.equals(st.session_state[GUESTS_KEY]):
+                st.session_state[GUESTS_KEY] = edited
+                cfg["guests"] = _df_to_records(edited)
 
     with tabs[2]:
         st.caption("Add/edit room types. Changes are included when you click **Save config**.")
@@ -505,6 +778,7 @@ def config_editor(cfg: dict) -> tuple[dict, bool]:
                 base,
                 columns=["name", "min_guests", "max_guests", "category_extras"],
                 empty_row={"name": "", "min_guests": 1, "max_guests": 99, "category_extras": ""},
+                dtypes=ROOMCAT_DTYPES,
             )
 
         edited = st.data_editor(
@@ -523,53 +797,61 @@ def config_editor(cfg: dict) -> tuple[dict, bool]:
             },
         )
 
-        edited = _apply_row_defaults(edited, "name", {"min_guests": 1, "max_guests": 99})
-        edited["name"] = edited["name"].fillna("").astype(str).str.strip()
-        edited["min_guests"] = pd.to_numeric(edited["min_guests"], errors="coerce").fillna(1).astype(int)
-        edited["max_guests"] = pd.to_numeric(edited["max_guests"], errors="coerce").fillna(99).astype(int)
-
-        if "category_extras" not in edited.columns:
-            edited["category_extras"] = ""
-        edited["category_extras"] = edited["category_extras"].fillna("").astype(str)
+        edited_key = _df_content_key(edited)
+        if st.session_state.get("_roomcats_clean") != edited_key:
+            edited = _clean_roomcats_df(edited)
+            st.session_state["_roomcats_clean"] = edited_key
 
-        edited = edited[edited["name"] != ""].reset_index(drop=True)
-
-        st.session_state[ROOMCATS_KEY] = edited
-        cfg["room_categories"] = edited.to_dict(orient="records")
+            if not edited.equals(st.session_state[ROOMCATS_KEY]):
+                st.session_state[ROOMCATS_KEY] = edited
+                cfg["room_categories"] = _df_to_records(edited)
 
     with tabs[3]:
-        col1, col2 = st.columns(2)
-        with col1:
-            st.subheader("Requests & extras (global)")
-            services_txt = st.text_area("One per line", "\n".join(cfg.get("extra_services", [])), height=240)
-            cfg["extra_services"] = [s.strip() for s in services_txt.splitlines() if s.strip()]
-        with col2:
-            st.subheader("Follow-up tasks")
-            followups_txt = st.text_area("One per line", "\n".join(cfg.get("follow_up_tasks", [])), height=240)
-            cfg["follow_up_tasks"] = [s.strip() for s in followups_txt.splitlines() if s.strip()]
+        # a form batches typing into one rerun when Apply is clicked
+        with st.form("services_form", border=False):
+            col1, col2 = st.columns(2)
+            with col1:
+                st.subheader("Requests & extras (global)")
+                _init_textarea_state("cfg_extra_services_textarea", cfg.get("extra_services", []))
+                services_txt = st.text_area("One per line", height=240, key="cfg_extra_services_textarea")
+            with col2:
+                st.subheader("Follow-up tasks")
+                _init_textarea_state("cfg_followups_textarea", cfg.get("follow_up_tasks", []))
+                followups_txt = st.text_area("One per line", height=240, key="cfg_followups_textarea")
+            services_applied = st.form_submit_button("Apply")
+
+        st.caption("Click **Apply** to take over the lists, then **Save config**.")
+        if services_applied:
+            cfg["extra_services"] = _nonempty_lines(services_txt)
+            cfg["follow_up_tasks"] = _nonempty_lines(followups_txt)
 
     with tabs[4]:
-        pol = dict(cfg.get("breakfast_policy", {}))
-        pol["enabled"] = st.checkbox("Enable breakfast", bool(pol.get("enabled", False)))
-        pol["probability_any_breakfast"] = st.slider(
-            "Probability any breakfast",
-            0.0,
-            1.0,
-            float(pol.get("probability_any_breakfast", 0.7)),
-        )
-        pol["probability_full_group_if_any"] = st.slider(
-            "Probability full group if any",
-            0.0,
-            1.0,
-            float(pol.get("probability_full_group_if_any", 0.7)),
-        )
+        pol = cfg.setdefault("breakfast_policy", {})
+        with st.form("breakfast_form", border=False):
+            pol["enabled"] = st.checkbox("Enable breakfast", bool(pol.get("enabled", False)))
+            pol["probability_any_breakfast"] = st.slider(
+                "Probability any breakfast",
+                0.0,
+                1.0,
+                float(pol.get("probability_any_breakfast", 0.7)),
+            )
+            pol["probability_full_group_if_any"] = st.slider(
+                "Probability full group if any",
+                0.0,
+                1.0,
+                float(pol.get("probability_full_group_if_any", 0.7)),
+            )
+
+            _init_textarea_state("cfg_breakfast_types_textarea", cfg.get("breakfast_types", []))
+            types_txt = st.text_area("Breakfast types (one per line)", height=160, key="cfg_breakfast_types_textarea")
+            breakfast_applied = st.form_submit_button("Apply")
 
-        types_txt = st.text_area("Breakfast types (one per line)", "\n".join(cfg.get("breakfast_types", [])), height=160)
-        cfg["breakfast_types"] = [t.strip() for t in types_txt.splitlines() if t.strip()]
-        cfg["breakfast_policy"] = pol
+        st.caption("Click **Apply** to take over the breakfast settings, then **Save config**.")
+        if breakfast_applied:
+            cfg["breakfast_types"] = _nonempty_lines(types_txt)
 
     st.divider()
-    errors = validate_config(cfg)
+    errors = _validate_config_if_changed(cfg)
     if errors:
         st.error("Config has issues:\n\n- " + "\n- ".join(errors))
     else:
@@ -580,22 +862,20 @@ def config_editor(cfg: dict) -> tuple[dict, bool]:
 
 
 def apply_difficulty_to_cfg(cfg: dict, difficulty: str) -> dict:
-    effective = dict(cfg)
     difficulty = (difficulty or "hard").strip().lower()
-
-    if difficulty in ("medium", "easy"):
-        effective["max_services"] = 0
-        effective["extra_services"] = []
-        effective["breakfast_policy"] = dict(effective.get("breakfast_policy", {}))
-        effective["breakfast_policy"]["enabled"] = False
-        effective["breakfast_types"] = []
-
-        roomcats = []
-        for c in effective.get("room_categories", []) or []:
-            c2 = dict(c)
-            c2["category_extras"] = ""
-            roomcats.append(c2)
-        effective["room_categories"] = roomcats
+    # shallow snapshot: config_editor edits the session cfg in place, and the pending
+    # scenario's follow-up draw must not pick up unsaved edits made before "Mark finished"
+    effective = dict(cfg)
+    if difficulty not in ("medium", "easy"):
+        return effective
+
+    effective["max_services"] = 0
+    effective["extra_services"] = []
+    effective["breakfast_policy"] = {**effective.get("breakfast_policy", {}), "enabled": False}
+    effective["breakfast_types"] = []
+    effective["room_categories"] = [
+        {**c, "category_extras": ""} for c in effective.get("room_categories", []) or []
+    ]
 
     if difficulty == "easy":
         effective["follow_up_probability"] = 0.0
@@ -606,8 +886,6 @@ def apply_difficulty_to_cfg(cfg: dict, difficulty: str) -> dict:
 
 # -------------------- main UI --------------------
 
-st.set_page_config(page_title="ReservoDojo", layout="wide")
-
 if "is_saving_finish" not in st.session_state:
     st.session_state["is_saving_finish"] = False
 
@@ -630,17 +908,19 @@ with st.sidebar:
         logout()
 
 role = st.session_state.get("role", "user")
-accommodation_id = st.session_state["accommodation_id"]
+
+# start the Review prefetch first so it runs while the config is loaded
+if role == "admin":
+    prefetch_review_tasks(st.session_state["accommodation_id"])
 
 if "cfg" not in st.session_state:
     st.session_state["cfg"] = load_or_init_config()
 
-cfg = st.session_state["cfg"]
-
 col_logo, col_title = st.columns([1, 4], vertical_alignment="center")
 with col_logo:
-    if LOGO_PATH.exists():
-        st.image(str(LOGO_PATH), width=150)
+    logo = _logo_bytes()
+    if logo:
+        st.image(logo, width=150)
 with col_title:
     st.markdown("## ReservoDojo")
     st.caption("Practice real reservations")
@@ -654,8 +934,15 @@ if role == "admin":
 
 page = st.radio("Menu", menu_options, horizontal=True)
 
+
 # -------------------- USERS (admin only) --------------------
-if page == "Users":
+
+
+def users_page() -> None:
+    import pandas as pd
+    role = st.session_state.get("role", "user")
+    accommodation_id = st.session_state["accommodation_id"]
+
     if role != "admin":
         st.error("Admins only.")
         st.stop()
@@ -731,8 +1018,15 @@ if page == "Users":
     except Exception as e:
         st.error(f"Could not load members: {e}")
 
+
 # -------------------- CONFIG (admin only) --------------------
-elif page == "Config":
+
+
+@st.fragment
+def config_page() -> None:
+    role = st.session_state.get("role", "user")
+    cfg = st.session_state["cfg"]
+
     if role != "admin":
         st.error("Admins only.")
         st.stop()
@@ -745,16 +1039,23 @@ elif page == "Config":
             require_auth_or_login()
             save_config(updated_cfg)
 
-            st.session_state.pop("guests_editor_df", None)
-            st.session_state.pop("roomcats_editor_df", None)
+            for k in ["guests_editor_df", "roomcats_editor_df", "_guests_clean", "_roomcats_clean"]:
+                st.session_state.pop(k, None)
 
             st.success("Saved config to database.")
             st.rerun()
         except Exception as e:
             st.error(f"Save failed: {e}")
 
+
 # -------------------- SCENARIO --------------------
-elif page == "Scenario":
+
+
+@st.fragment
+def scenario_page() -> None:
+    accommodation_id = st.session_state["accommodation_id"]
+    cfg = st.session_state["cfg"]
+
     col1, col2 = st.columns([2, 1], gap="large")
 
     with col1:
@@ -799,28 +1100,14 @@ elif page == "Scenario":
 
                 st.divider()
 
-                st.markdown(
-                    dedent(
-                        f"""
-                    <div style="display:grid; grid-template-columns: 180px 1fr; row-gap:4px; column-gap:10px; line-height:1.25;">
-                      <div style="padding:4px;"><strong>Room type</strong></div>
-                      <div style="padding:4px;">{scenario.get("Room category","")}</div>
-
-                      <div style="background:rgba(0,0,0,0.03); padding:4px;"><strong>Guests</strong></div>
-                      <div style="background:rgba(0,0,0,0.03); padding:4px;">{scenario.get("Number of guests","")}</div>
-
-                      <div style="padding:4px;"><strong>Nights</strong></div>
-                      <div style="padding:4px;">{scenario.get("Nights","")}</div>
-
-                      <div style="background:rgba(0,0,0,0.03); padding:4px;"><strong>Arrival</strong></div>
-                      <div style="background:rgba(0,0,0,0.03); padding:4px;">{scenario.get("Arrival","")}</div>
-
-                      <div style="padding:4px;"><strong>Departure</strong></div>
-                      <div style="padding:4px;">{scenario.get("Departure","")}</div>
-                    </div>
-                    """
-                    ).strip(),
-                    unsafe_allow_html=True,
+                render_detail_grid(
+                    [
+                        ("Room type", scenario.get("Room category", "")),
+                        ("Guests", scenario.get("Number of guests", "")),
+                        ("Nights", scenario.get("Nights", "")),
+                        ("Arrival", scenario.get("Arrival", "")),
+                        ("Departure", scenario.get("Departure", "")),
+                    ]
                 )
 
                 st.divider()
@@ -895,7 +1182,7 @@ elif page == "Scenario":
 
             try:
                 sb = get_authed_sb()
-                db.insert_task(
+                inserted = db.insert_task(
                     sb=sb,
                     accommodation_id=accommodation_id,
                     created_by=st.session_state["user_id"],
@@ -904,6 +1191,9 @@ elif page == "Scenario":
                     scenario_json=st.session_state["scenario"],
                     followup_text=followup,
                 )
+                remember_inserted_task(inserted)
+                # Progress reads the full list; make the new task count right away
+                _cached_list_tasks.clear()
 
                 st.session_state["is_saving_finish"] = False
                 st.session_state["finish_save_message"] = (
@@ -938,15 +1228,22 @@ elif page == "Scenario":
                 file_name=f"PMS_Scenario_{st.session_state['generated_id']}_BN-{booking_number_clean}.txt",
             )
 
+
 # -------------------- REVIEW --------------------
-elif page == "Review":
+
+
+@st.fragment
+def review_page() -> None:
+    import pandas as pd
+    accommodation_id = st.session_state["accommodation_id"]
+
     st.subheader("Review (latest 50)")
 
     try:
         require_auth_or_login()
         ensure_membership_loaded()
         sb = get_authed_sb()
-        rows = db.list_tasks(sb, accommodation_id, limit=50)
+        rows = list_review_tasks(accommodation_id, 50)
     except Exception as e:
         st.error(f"Could not load scenarios for review: {e}")
         st.stop()
@@ -966,37 +1263,40 @@ elif page == "Review":
     needed_user_ids = sorted({str(r.get("created_by") or "") for r in rows if r.get("created_by")})
     profiles = db.get_profiles_by_ids(sb, needed_user_ids)
 
-    table_rows = []
-    row_map = []
-
-    for i, r in enumerate(rows):
-        status = (r.get("review_status") or "new").strip()
-        if hide_done_perfect and status in ("done", "perfect"):
-            continue
-
-        sc = r.get("scenario_json", {}) or {}
-
-        created_by = str(r.get("created_by") or "")
-        created_name = profiles.get(created_by, {}).get("display_name", "Unknown")
-
-        table_rows.append(
-            {
-                "Finished": _date_only(r.get("finished_at", "")),
-                "Status": status.replace("_", " "),
-                "Booking number": r.get("booking_number", ""),
-                "Guest name": sc.get("Guest name", ""),
-                "Room type": sc.get("Room category", ""),
-                "Created by": created_name,
-                "Follow-up": r.get("followup_text") or "",
-            }
-        )
-        row_map.append(i)
+    summary = pd.DataFrame.from_records(
+        rows,
+        columns=["id", "finished_at", "review_status", "booking_number", "guest_name", "room_category", "created_by", "followup_text"],
+    )
+    status = summary["review_status"].fillna("new").astype(str).str.strip()
+    if hide_done_perfect:
+        visible = ~status.isin(["done", "perfect"])
+    else:
+        visible = pd.Series(True, index=summary.index)
 
-    if not table_rows:
+    if not visible.any():
         st.info("Nothing to show with current filter.")
         st.stop()
 
-    df = pd.DataFrame(table_rows)
+    shown = summary[visible]
+    # the table selection is positional and refers to the list the user clicked on,
+    # i.e. the previous render; keep those ids to resolve it
+    shown_ids = shown["id"].astype(str).tolist()
+    clicked_ids = st.session_state.get("_review_shown_ids", shown_ids)
+    st.session_state["_review_shown_ids"] = shown_ids
+    created_names = {uid: p.get("display_name", "Unknown") for uid, p in profiles.items()}
+
+    df = pd.DataFrame(
+        {
+            # finished_at is an ISO timestamp, so its first 10 chars are the date
+            "Finished": shown["finished_at"].fillna("").astype(str).str[:10],
+            "Status": status[visible].str.replace("_", " "),
+            "Booking number": shown["booking_number"],
+            "Guest name": shown["guest_name"].fillna(""),
+            "Room type": shown["room_category"].fillna(""),
+            "Created by": shown["created_by"].fillna("").astype(str).map(lambda uid: created_names.get(uid, "Unknown")),
+            "Follow-up": shown["followup_text"].fillna(""),
+        }
+    ).reset_index(drop=True).astype("string[pyarrow]")
     st.caption("Click a row to view details and set trainer review below.")
 
     event = st.dataframe(
@@ -1016,15 +1316,33 @@ elif page == "Review":
     except Exception:
         selected_display_idx = None
 
+    # pin the task id when the selection changes, so later reruns keep showing the same task
+    if selected_display_idx != st.session_state.get("_review_selected_idx"):
+        st.session_state["_review_selected_idx"] = selected_display_idx
+        st.session_state["_review_selected_id"] = (
+            clicked_ids[selected_display_idx]
+            if selected_display_idx is not None and selected_display_idx < len(clicked_ids)
+            else None
+        )
+    selected_id = st.session_state.get("_review_selected_id")
+
     st.divider()
     st.subheader("Details")
 
-    if selected_display_idx is None:
+    if selected_id is None:
         st.info("Select a row above to see details.")
         st.stop()
 
-    r = rows[row_map[selected_display_idx]]
-    scenario = r.get("scenario_json", {}) or {}
+    r = next((row for row in rows if str(row.get("id")) == selected_id), None)
+    if r is None:
+        st.info("The selected scenario is no longer in the list. Select a row above to see details.")
+        st.stop()
+    try:
+        detail = _cached_get_task(st.session_state["user_id"], str(r.get("id"))) or {}
+    except Exception as e:
+        st.error(f"Could not load scenario details: {e}")
+        st.stop()
+    scenario = detail.get("scenario_json", {}) or {}
     followup = r.get("followup_text") or ""
     finished = _date_only(r.get("finished_at", ""))
 
@@ -1045,6 +1363,7 @@ elif page == "Review":
             require_auth_or_login()
             sb2 = get_authed_sb()
             db.update_task_review_status(sb2, task_id, new_status)
+            invalidate_task_caches()
             st.success("Saved trainer review.")
             st.rerun()
         except Exception as e:
@@ -1065,16 +1384,15 @@ elif page == "Review":
 
         st.divider()
 
-        def row_line(label, value):
-            c1, c2 = st.columns([1, 3])
-            c1.markdown(f"**{label}**")
-            c2.markdown(str(value) if value is not None else "")
-
-        row_line("Room type", scenario.get("Room category", ""))
-        row_line("Number of guests", scenario.get("Number of guests", ""))
-        row_line("Nights", scenario.get("Nights", ""))
-        row_line("Arrival", scenario.get("Arrival", ""))
-        row_line("Departure", scenario.get("Departure", ""))
+        render_detail_grid(
+            [
+                ("Room type", scenario.get("Room category", "")),
+                ("Number of guests", scenario.get("Number of guests", "")),
+                ("Nights", scenario.get("Nights", "")),
+                ("Arrival", scenario.get("Arrival", "")),
+                ("Departure", scenario.get("Departure", "")),
+            ]
+        )
 
         st.divider()
 
@@ -1103,15 +1421,21 @@ elif page == "Review":
         key=f"dl_{task_id}",
     )
 
+
 # -------------------- PROGRESS --------------------
-elif page == "Progress":
+
+
+def progress_page() -> None:
+    import pandas as pd
+    accommodation_id = st.session_state["accommodation_id"]
+    cfg = st.session_state["cfg"]
+
     st.subheader("Training progress")
 
     try:
         require_auth_or_login()
         ensure_membership_loaded()
-        sb = get_authed_sb()
-        rows = db.list_tasks(sb, accommodation_id, limit=500)
+        rows = _cached_list_tasks(st.session_state["user_id"], accommodation_id, 500)
     except Exception as e:
         st.error(f"Could not load progress: {e}")
         st.stop()
@@ -1159,6 +1483,23 @@ elif page == "Progress":
         height=table_height,
     )
 
+
 # -------------------- HELP --------------------
-elif page == "Help":
+
+
+def help_page() -> None:
     render_help_tab()
+
+
+# -------------------- page dispatch --------------------
+
+PAGES = {
+    "Users": users_page,
+    "Config": config_page,
+    "Scenario": scenario_page,
+    "Review": review_page,
+    "Progress": progress_page,
+    "Help": help_page,
+}
+
+PAGES[page]()
@@ -65,23 +65,9 @@ def default_config() -> dict:
 
 def normalize_config(cfg: dict) -> dict:
     # ensures keys exist; mirrors your ensure_defaults()
-    base = default_config()
-
-    # shallow merge:
-    for k, v in cfg.items():
-        base[k] = v
-
-    base.setdefault("guests", [])
-    base.setdefault("room_categories", [])
-    base.setdefault("extra_services", [])
-    base.setdefault("follow_up_tasks", [])
-
-    base.setdefault("booking_window", default_config()["booking_window"])
-    base.setdefault("stay_length_nights", default_config()["stay_length_nights"])
-    base.setdefault("breakfast_types", default_config()["breakfast_types"])
-    base.setdefault("breakfast_policy", default_config()["breakfast_policy"])
-
-    return base
+    # shallow merge: every top-level key comes from cfg if present, else from the defaults
+    # (default_config() already provides all keys, so no setdefault pass is needed)
+    return {**default_config(), **cfg}
 
 def validate_config(cfg: dict) -> list[str]:
     errors: list[str] = []
@@ -1,10 +1,101 @@
 # db.py
 from __future__ import annotations
 
+import base64
+import json
+import os
+import time
+from functools import lru_cache
 from typing import Optional, Any
 
+import httpx
 from supabase import create_client, Client
 
+try:
+    import streamlit as _st  # type: ignore
+except ImportError:  # db.py also works outside Streamlit
+    _st = None
+
+
+VALID_ROLES = frozenset({"admin", "user"})
+VALID_REVIEW_STATUSES = frozenset({"new", "needs_review", "done", "perfect"})
+
+# authed_client binds the access token directly only if it stays valid at least this long;
+# app.py caches authed clients for less than this
+MIN_BIND_TOKEN_SECONDS = 900
+
+
+def _token_seconds_left(access_token: str) -> Optional[float]:
+    """Seconds until the JWT's exp claim (signature not checked), or None if unreadable."""
+    try:
+        payload = access_token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return float(claims["exp"]) - time.time()
+    except Exception:
+        return None
+
+
+def _keyset_filter(cursor: tuple[str, str]) -> str:
+    """PostgREST or-filter for rows after (finished_at, id) in (finished_at desc, id desc) order."""
+    finished_at, task_id = cursor
+    return f'finished_at.lt."{finished_at}",and(finished_at.eq."{finished_at}",id.lt.{task_id})'
+
+
+@lru_cache(maxsize=1)
+def _pooled_transport() -> httpx.HTTPTransport:
+    """
+    One connection pool shared by the PostgREST sessions of all clients.
+
+    Every authed client has its own headers (the user's JWT), but they all talk
+    to the same host, so they can reuse the same keep-alive connections.
+    Limits are tunable via SUPABASE_MAX_CONNECTIONS / SUPABASE_MAX_KEEPALIVE /
+    SUPABASE_KEEPALIVE_EXPIRY.
+    """
+    limits = httpx.Limits(
+        max_connections=int(os.environ.get("SUPABASE_MAX_CONNECTIONS", "60")),
+        max_keepalive_connections=int(os.environ.get("SUPABASE_MAX_KEEPALIVE", "40")),
+        keepalive_expiry=float(os.environ.get("SUPABASE_KEEPALIVE_EXPIRY", "60")),
+    )
+    try:
+        # HTTP/2 multiplexes concurrent requests (e.g. the background prefetch) over one connection
+        return httpx.HTTPTransport(http2=True, limits=limits)
+    except ImportError:
+        # the h2 package (httpx[http2]) is missing: stay on HTTP/1.1
+        return httpx.HTTPTransport(limits=limits)
+
+
+def _use_pooled_transport(sb: Client) -> None:
+    """
+    Point the client's PostgREST session at the shared pool.
+
+    supabase-py rebuilds sb.postgrest after auth events (set_session, token
+    refresh), so call this after the session has been applied.
+    """
+    try:
+        session = sb.postgrest.session
+        session._transport = _pooled_transport()
+        session.timeout = httpx.Timeout(
+            float(os.environ.get("SUPABASE_TIMEOUT", "30")),
+            connect=float(os.environ.get("SUPABASE_CONNECT_TIMEOUT", "5")),
+        )
+    except AttributeError:
+        # unexpected supabase-py/postgrest-py layout: keep the client's own pool
+        pass
+
+
+@lru_cache(maxsize=4)
+def _shared_client(url: str, key: str) -> Client:
+    """
+    One Supabase client per (url, key), reused across calls.
+
+    Only for clients that never carry a user session (e.g. the service role
+    client); anything that calls sign_in/set_session must get its own client,
+    otherwise concurrent users would overwrite each other's auth state.
+    """
+    sb = create_client(url, key)
+    _use_pooled_transport(sb)
+    return sb
+
 
 class DB:
     """
@@ -22,12 +113,13 @@ class DB:
         self.service_role_key = service_role_key or ""
 
     def client(self) -> Client:
+        # fresh per call: auth calls store the user's session on the client
         return create_client(self.url, self.anon_key)
 
     def admin_client(self) -> Client:
         if not self.service_role_key:
             raise RuntimeError("Missing SUPABASE_SERVICE_ROLE_KEY in secrets.")
-        return create_client(self.url, self.service_role_key)
+        return _shared_client(self.url, self.service_role_key)
 
     # ---------- small helpers ----------
 
@@ -74,9 +166,19 @@ class DB:
         CRITICAL:
         If session cannot be applied/refreshed, we RAISE instead of returning an unauthed client.
         Returning an unauthed client causes silent write failures after idle.
+
+        While the access token is valid for at least MIN_BIND_TOKEN_SECONDS it is
+        bound to PostgREST directly; set_session (a GoTrue round trip, which also
+        refreshes expired tokens) only runs when the token is close to expiry.
         """
         sb = self.client()
 
+        seconds_left = _token_seconds_left(access_token)
+        if seconds_left is not None and seconds_left > MIN_BIND_TOKEN_SECONDS:
+            sb.postgrest.auth(access_token)
+            _use_pooled_transport(sb)
+            return sb
+
         try:
             auth_res = sb.auth.set_session(access_token, refresh_token)
         except Exception as e:
@@ -91,13 +193,14 @@ class DB:
             new_refresh = getattr(session, "refresh_token", None)
 
             if new_access and new_refresh and (new_access != access_token or new_refresh != refresh_token):
-                try:
-                    import streamlit as st  # type: ignore
-                    st.session_state["access_token"] = new_access
-                    st.session_state["refresh_token"] = new_refresh
-                except Exception:
-                    pass
-
+                if _st is not None:
+                    try:
+                        _st.session_state["access_token"] = new_access
+                        _st.session_state["refresh_token"] = new_refresh
+                    except Exception:
+                        pass
+
+        _use_pooled_transport(sb)
         return sb
 
     # ---------- admin: create user ----------
@@ -207,20 +310,50 @@ class DB:
 
     def create_accommodation(self, sb: Client, name: str) -> str:
         try:
-            res = sb.table("accommodations").insert({"name": name}).execute()
+            res = sb.table("accommodations").insert({"name": name}, returning="representation").execute()
         except Exception as e:
             raise RuntimeError(f"Supabase create_accommodation failed: {repr(e)}")
 
         if res is None or getattr(res, "error", None):
             raise RuntimeError(f"Supabase create_accommodation error: {getattr(res, 'error', None)}")
 
-        row = (res.data or [None])[0]
-        if not row or "id" not in row:
-            raise RuntimeError("Supabase create_accommodation returned no id.")
-        return row["id"]
+        rows = res.data or []
+        if not rows or "id" not in rows[0]:
+            # an RLS policy that filters the inserted row also ends up here
+            raise RuntimeError("Supabase create_accommodation returned no id (row not visible after insert?).")
+        return rows[0]["id"]
+
+    def create_accommodation_with_admin(self, sb: Client, name: str, user_id: str, config_json: dict) -> str:
+        """
+        Signup in one round trip: accommodation row, admin membership and initial
+        config are created atomically by the create_accommodation_with_admin RPC
+        (supabase/migrations). Falls back to three separate writes if the RPC has
+        not been deployed yet. Needs the service role client.
+        """
+        try:
+            res = sb.rpc(
+                "create_accommodation_with_admin",
+                {"p_name": name, "p_user": user_id, "p_config": config_json},
+            ).execute()
+        except Exception as e:
+            msg = str(e)
+            if "PGRST202" in msg or "Could not find the function" in msg:
+                accommodation_id = self.create_accommodation(sb, name)
+                self.add_membership(sb, accommodation_id, user_id, "admin")
+                self.upsert_config(sb, accommodation_id, config_json)
+                return accommodation_id
+            raise RuntimeError(f"Supabase create_accommodation_with_admin failed: {repr(e)}")
+
+        if res is None or getattr(res, "error", None):
+            raise RuntimeError(f"Supabase create_accommodation_with_admin error: {getattr(res, 'error', None)}")
+
+        accommodation_id = res.data
+        if not accommodation_id:
+            raise RuntimeError("Supabase create_accommodation_with_admin returned no id.")
+        return str(accommodation_id)
 
     def add_membership(self, sb: Client, accommodation_id: str, user_id: str, role: str) -> None:
-        if role not in ("admin", "user"):
+        if role not in VALID_ROLES:
             raise ValueError("Invalid role.")
         try:
             res = (
@@ -267,7 +400,7 @@ class DB:
                 return None
             raise RuntimeError(f"Supabase get_my_membership error: {err}")
 
-        data = getattr(res, "data", None) or []
+        data = res.data or []
         if isinstance(data, list) and data and isinstance(data[0], dict):
             row = data[0]
             if row.get("accommodation_id") and row.get("role"):
@@ -334,7 +467,7 @@ class DB:
                 return None
             raise RuntimeError(f"Supabase get_config error: {err}")
 
-        data = getattr(res, "data", None) or []
+        data = res.data or []
         if isinstance(data, list) and data and isinstance(data[0], dict):
             return data[0].get("config_json")
 
@@ -367,55 +500,160 @@ class DB:
         booking_number: str,
         scenario_json: dict,
         followup_text: Optional[str],
-    ) -> None:
+    ) -> Optional[dict]:
+        """
+        Inserts a finished task and returns the stored row (incl. id and finished_at),
+        or None if PostgREST did not send a representation back.
+        """
+        rows = self.insert_tasks(
+            sb,
+            [
+                {
+                    "accommodation_id": accommodation_id,
+                    "created_by": created_by,
+                    "generated_id": generated_id,
+                    "booking_number": booking_number,
+                    "scenario_json": scenario_json,
+                    "followup_text": followup_text,
+                }
+            ],
+        )
+        return rows[0] if rows else None
+
+    def insert_tasks(self, sb: Client, rows: list[dict]) -> list[dict]:
+        """
+        Inserts several tasks in one request (PostgREST accepts an array body).
+        Rows without review_status are stored as "new". Returns the stored rows.
+        """
+        if not rows:
+            return []
+        payload = [r if "review_status" in r else {**r, "review_status": "new"} for r in rows]
         try:
+            res = sb.table("tasks").insert(payload, returning="representation").execute()
+        except Exception as e:
+            raise RuntimeError(f"Supabase insert_tasks failed: {repr(e)}")
+
+        if res is None:
+            raise RuntimeError("Supabase insert_tasks failed: execute() returned None.")
+        err = getattr(res, "error", None)
+        if err:
+            raise RuntimeError(f"Supabase insert_tasks error: {err}")
+
+        data = res.data or []
+        return [r for r in data if isinstance(r, dict)] if isinstance(data, list) else []
+
+    def list_tasks(
+        self,
+        sb: Client,
+        accommodation_id: str,
+        limit: int = 50,
+        offset: int = 0,
+        cursor: Optional[tuple[str, str]] = None,
+    ) -> list[dict]:
+        """
+        Newest first. Page with cursor=DB.task_cursor(previous_page) (keyset, index-backed)
+        or with offset.
+        """
+        try:
+            query = (
+                sb.table("tasks")
+                .select("id, generated_id, booking_number, followup_text, finished_at, scenario_json, review_status, created_by")
+                .eq("accommodation_id", accommodation_id)
+            )
+            if cursor is not None:
+                query = query.or_(_keyset_filter(cursor))
             res = (
+                query.order("finished_at", desc=True)
+                .order("id", desc=True)
+                .range(offset, offset + limit - 1)
+                .execute()
+            )
+        except Exception as e:
+            raise RuntimeError(f"Supabase list_tasks failed: {repr(e)}")
+
+        if res is None:
+            return []
+        err = getattr(res, "error", None)
+        if err:
+            raise RuntimeError(f"Supabase list_tasks error: {err}")
+
+        return res.data or []
+
+    def list_tasks_summary(
+        self,
+        sb: Client,
+        accommodation_id: str,
+        limit: int = 50,
+        offset: int = 0,
+        cursor: Optional[tuple[str, str]] = None,
+    ) -> list[dict]:
+        """
+        Like list_tasks, but without the scenario_json blob.
+        Only the scenario fields shown in the Review table are projected server-side.
+        Paging works the same way (cursor or offset).
+        """
+        try:
+            query = (
                 sb.table("tasks")
-                .insert(
-                    {
-                        "accommodation_id": accommodation_id,
-                        "created_by": created_by,
-                        "generated_id": generated_id,
-                        "booking_number": booking_number,
-                        "scenario_json": scenario_json,
-                        "followup_text": followup_text,
-                        "review_status": "new",
-                    }
+                .select(
+                    "id, generated_id, booking_number, followup_text, finished_at, review_status, created_by, "
+                    'guest_name:scenario_json->>"Guest name", room_category:scenario_json->>"Room category"'
                 )
+                .eq("accommodation_id", accommodation_id)
+            )
+            if cursor is not None:
+                query = query.or_(_keyset_filter(cursor))
+            res = (
+                query.order("finished_at", desc=True)
+                .order("id", desc=True)
+                .range(offset, offset + limit - 1)
                 .execute()
             )
         except Exception as e:
-            raise RuntimeError(f"Supabase insert_task failed: {repr(e)}")
+            raise RuntimeError(f"Supabase list_tasks_summary failed: {repr(e)}")
 
         if res is None:
-            raise RuntimeError("Supabase insert_task failed: execute() returned None.")
+            return []
         err = getattr(res, "error", None)
         if err:
-            raise RuntimeError(f"Supabase insert_task error: {err}")
+            raise RuntimeError(f"Supabase list_tasks_summary error: {err}")
+
+        return res.data or []
+
+    @staticmethod
+    def task_cursor(rows: list[dict]) -> Optional[tuple[str, str]]:
+        """Keyset cursor (finished_at, id) after the last row of a page, or None for an empty page."""
+        if not rows:
+            return None
+        last = rows[-1]
+        return str(last["finished_at"]), str(last["id"])
 
-    def list_tasks(self, sb: Client, accommodation_id: str, limit: int = 50) -> list[dict]:
+    def get_task(self, sb: Client, task_id: str) -> Optional[dict]:
         try:
             res = (
                 sb.table("tasks")
                 .select("id, generated_id, booking_number, followup_text, finished_at, scenario_json, review_status, created_by")
-                .eq("accommodation_id", accommodation_id)
-                .order("finished_at", desc=True)
-                .limit(limit)
+                .eq("id", task_id)
+                .limit(1)
                 .execute()
             )
         except Exception as e:
-            raise RuntimeError(f"Supabase list_tasks failed: {repr(e)}")
+            raise RuntimeError(f"Supabase get_task failed: {repr(e)}")
 
         if res is None:
-            return []
+            return None
         err = getattr(res, "error", None)
         if err:
-            raise RuntimeError(f"Supabase list_tasks error: {err}")
+            raise RuntimeError(f"Supabase get_task error: {err}")
 
-        return res.data or []
+        data = res.data or []
+        if isinstance(data, list) and data and isinstance(data[0], dict):
+            return data[0]
+
+        return None
 
     def update_task_review_status(self, sb: Client, task_id: str, review_status: str) -> None:
-        if review_status not in ("new", "needs_review", "done", "perfect"):
+        if review_status not in VALID_REVIEW_STATUSES:
             raise ValueError("Invalid review_status.")
 
         try:
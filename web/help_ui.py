@@ -1,185 +1,59 @@
+from pathlib import Path
+
 import streamlit as st
 
+HELP_CONTENT_PATH = Path(__file__).resolve().parent / "help_content.md"
+
+
+# Static help text, each block sent as one markdown element instead of dozens of st.markdown/st.write calls.
+
+_LOGIN_INTRO_MD = """
+### What this tool is for
+
+ReservoDojo creates realistic booking scenarios for training. Trainees create the booking in the real PMS. Trainers then review the result and mark it as Perfect or Needs review.
+"""
+
+_LOGIN_WORKFLOW_MD = """
+**Step 1 — Generate a scenario**
+
+The tool generates a booking request (guest, dates, room category, guests, special requests).
+
+**Step 2 — Create the booking in the PMS**
+
+The trainee creates the booking in the real PMS according to the scenario.
+
+**Step 3 — Review**
+
+The trainer compares scenario vs. booking and marks the scenario as Perfect or Needs review (and set it to Done after reviewing it with the trainee)
+"""
+
+_HELP_DEV_MD = """
+### Dev
+
+d.berger@dontsniff.co.uk
+
+https://github.com/balzamas/pms_trainer/
+"""
+
 
 def render_login_explanation() -> None:
     """Shown on the login screen, above or next to the login form."""
-    st.markdown("### What this tool is for")
-    st.write(
-        "ReservoDojo creates realistic booking scenarios for training. "
-        "Trainees create the booking in the real PMS. "
-        "Trainers then review the result and mark it as Perfect or Needs review."
-    )
+    st.markdown(_LOGIN_INTRO_MD)
 
     with st.expander("How the training workflow works", expanded=False):
-        st.markdown("**Step 1 — Generate a scenario**")
-        st.write("The tool generates a booking request (guest, dates, room category, guests, special requests).")
-        st.markdown("**Step 2 — Create the booking in the PMS**")
-        st.write("The trainee creates the booking in the real PMS according to the scenario.")
-        st.markdown("**Step 3 — Review**")
-        st.write("The trainer compares scenario vs. booking and marks the scenario as Perfect or Needs review (and set it to Done after reviewing it with the trainee)")
+        st.markdown(_LOGIN_WORKFLOW_MD)
+
+
+@st.cache_data(show_spinner=False)
+def _load_help_md() -> str:
+    # the help tab text up to the troubleshooting expander; read once per process
+    return HELP_CONTENT_PATH.read_text(encoding="utf-8")
 
 
 def render_help_tab() -> None:
-    st.markdown("## Help")
-    st.write(
-        "This page explains the workflow and the main options in ReservoDojo. "
-        "It is written for trainees and trainers."
-        
-    )
-    st.markdown(
-    "<div style='margin-top:4px;'>"
-    "<a href='https://github.com/balzamas/pms_trainer/issues' target='_blank'>"
-    "To see planned features, report a bug or suggest an improvement (GitHub Issues)"
-    "</a>"
-    "</div>",
-    unsafe_allow_html=True
-    )
-
-
-    # -------------------- workflow --------------------
-    st.markdown("### Workflow (from scenario to feedback)")
-
-    st.markdown("**1) Scenario is generated**")
-    st.write(
-        "A new scenario is created with a realistic booking request. "
-        "This is the description of what should be entered into the PMS."
-    )
-
-    st.markdown("**2) Trainee creates the booking in the PMS**")
-    st.write(
-        "The trainee opens the real PMS and creates the booking exactly as described: "
-        "dates, room type, number of guests, guest details, and any special requests."
-    )
-
-    st.markdown("**3) Trainer reviews the booking**")
-    st.write(
-        "The trainer checks the booking in the PMS, compares it with the scenario, "
-        "and then marks the scenario:"
-    )
-    st.markdown("- New: not reviewed yet")
-    st.markdown("- Needs review: mistakes found or improvements needed")
-    st.markdown("- Done: booking was discussed with trainee")
-    st.markdown("- Perfect: everything is perfect, no discussion needed")
-
-
-    st.divider()
-
-    # -------------------- navigation --------------------
-    st.markdown("### Pages and what they do")
-
-    st.markdown("**Scenario**")
-    st.write(
-        "Generate a new scenario and use it as the instruction for the trainee. "
-        "Before you generate, you can select a difficulty level. "
-        "After the trainee created the booking in the PMS, enter the booking number and mark the scenario as finished."
-    )
-
-    st.markdown("**Review**")
-    st.write(
-        "Shows previously finished scenarios. Click a row to see the scenario details in a readable format. "
-        "Trainers can mark each scenario as Perfect, Done or Needs review."
-    )
-
-    st.markdown("**Config**")
-    st.write(
-        "This controls what kind of scenarios can be generated. "
-        "You can think of it as the training setup: which guests exist, which room types exist, "
-        "what requests/extras are possible, and what the date range should be."
-    )
-
-    st.divider()
-
-    # -------------------- difficulty explained --------------------
-    st.markdown("### Difficulty levels")
-
-    st.write(
-        "When generating a scenario, you can choose a difficulty level. "
-        "Difficulty only changes which additional elements are included — the base scenario (guest, dates, room type, guests) stays realistic in all modes."
-    )
-
-    st.markdown("**Hard**")
-    st.markdown("- Includes requests/extras (if configured)")
-    st.markdown("- Breakfast can be included (if enabled in config)")
-    st.markdown("- Follow-up tasks can be generated when you finish a scenario")
-
-    st.markdown("**Medium**")
-    st.markdown("- No requests/extras")
-    st.markdown("- No breakfast")
-    st.markdown("- Follow-up tasks can still be generated when you finish a scenario")
-
-    st.markdown("**Easy**")
-    st.markdown("- No requests/extras")
-    st.markdown("- No breakfast")
-    st.markdown("- No follow-up tasks")
-
-    st.divider()
-
-    # -------------------- config explained --------------------
-    st.markdown("### Config explained (what each section changes)")
-
-    st.markdown("**General**")
-    st.write("Controls the timeframe and basic limits for generated scenarios.")
-    st.markdown("- **Earliest arrival / Latest arrival**: scenarios will use arrival dates within this range.")
-    st.markdown("- **Stay min nights / Stay max nights**: scenarios will use a stay length within this range.")
-    st.markdown(
-        "- **Max requests & extras**: maximum number of requests/extras that can appear in a scenario. "
-        "This applies to the combined pool of global extras and room-type extras."
-    )
-    st.markdown("- **Follow-up chance**: probability that a follow-up task is generated when a scenario is finished.")
-
-    st.markdown("**Guest profiles**")
-    st.write(
-        "Defines the guest names that can appear in scenarios. "
-        "Each guest can include a short comment (example: 'VIP', 'returning guest', 'allergic to nuts')."
-    )
-    st.markdown(
-        "- **Min guests / Max guests**: how many guests this profile can represent. "
-        "Example: a profile can be restricted to 1–2 guests."
-    )
-
-    st.markdown("**Room types**")
-    st.write("Defines the room types that can appear in scenarios.")
-    st.markdown(
-        "- **Min guests / Max guests**: occupancy range for that room type. "
-        "This helps generate realistic pairings between room type and number of guests."
-    )
-    st.markdown(
-        "- **Category extras**: optional extras specific to this room type. Use ';' to separate items. "
-        "These extras are mixed into the scenario's requests/extras."
-    )
-
-    st.markdown("**Requests & follow-ups**")
-    st.write("Controls what kinds of extras and follow-up tasks can appear.")
-    st.markdown("- **Requests & extras (global)**: one item per line. These can be selected for any room type.")
-    st.markdown("- **Follow-up tasks**: one item per line. These can appear as an additional training task after finishing.")
-
-    st.markdown("**Breakfast**")
-    st.write("Controls whether pre order breakfast can be part of scenarios.")
-    st.markdown("- **Enable breakfast**: allows breakfast items to appear in scenarios.")
-    st.markdown("- **Probability any breakfast**: chance that breakfast is included at all.")
-    st.markdown("- **Probability full group if any**: if breakfast is included, chance it applies to all guests.")
-    st.markdown("- **Breakfast types**: one type per line (example: 'Buffet', 'Continental', 'Vegan').")
-
-    st.divider()
-
-    # -------------------- practical tips --------------------
-    st.markdown("### Practical tips")
-
-    st.markdown("**For trainees**")
-    st.markdown("- Read the scenario carefully before starting in the PMS.")
-    st.markdown("- Double-check: dates, room type, number of guests, and requests.")
-    st.markdown("- Use notes/remarks fields for special requests when appropriate.")
-
-    st.markdown("**For trainers**")
-    st.markdown("- Review scenarios in Review and focus on New / Needs review.")
-    st.markdown("- When marking Needs review, discuss the booking together and explain what to change next time. After this is done, set it to...Done")
-
-    st.divider()
-
-    st.markdown("### Troubleshooting")
+    st.markdown(_load_help_md(), unsafe_allow_html=True)
+
     with st.expander("I cannot find a generated scenario", expanded=False):
         st.write("Check the Review filter and make sure scenarios are not hidden by the status filter.")
 
-    st.markdown("### Dev")
-    st.markdown("d.berger@dontsniff.co.uk")
-    st.markdown("https://github.com/balzamas/pms_trainer/")
+    st.markdown(_HELP_DEV_MD)
@@ -1,12 +1,20 @@
 # scenario.py
 from __future__ import annotations
 
+import json
 import random
 import re
-from datetime import date, datetime, timedelta
+import time
+from collections import Counter
+from datetime import date, timedelta
+from functools import lru_cache
 from typing import Optional
 
 
+# one generator for all scenario randomness
+_rng = random.Random()
+
+
 # -------------------- helpers --------------------
 
 def parse_category_extras(value) -> list[str]:
@@ -26,33 +34,31 @@ def parse_category_extras(value) -> list[str]:
 
 
 def unique_keep_order(items: list[str]) -> list[str]:
-    seen = set()
-    out = []
-    for s in items:
-        s = str(s).strip()
-        if not s:
-            continue
-        if s in seen:
-            continue
-        seen.add(s)
-        out.append(s)
-    return out
+    # dicts keep insertion order, so fromkeys dedups while preserving the first occurrence
+    return list(dict.fromkeys(s for s in (str(x).strip() for x in items) if s))
 
 
 # -------------------- scenario generation (from main.py) --------------------
 
-def choose_compatible_guest_category_and_count(cfg: dict):
-    guests = cfg.get("guests", [])
-    categories = cfg.get("room_categories", [])
+@lru_cache(maxsize=32)
+def _compat_pairs(key: str) -> tuple:
+    """
+    All (guest, category, low, high) combinations for the guests/categories
+    serialized in key. Cached because the config rarely changes between
+    generated scenarios; the returned dicts are shared, treat them as read-only.
+    """
+    guests, categories = json.loads(key)
 
-    if not guests:
-        raise ValueError("Config has no guests.")
-    if not categories:
-        raise ValueError("Config has no room_categories.")
+    # parse category occupancy once, not once per guest
+    parsed_categories = []
+    for c in categories:
+        try:
+            parsed_categories.append((c, int(c.get("min_guests", 1)), int(c.get("max_guests", 1))))
+        except Exception:
+            continue
 
     valid = []
-    for g_raw in guests:
-        g = dict(g_raw)
+    for g in guests:
         name = str(g.get("full_name", "")).strip()
         if not name:
             continue
@@ -69,30 +75,46 @@ def choose_compatible_guest_category_and_count(cfg: dict):
         if gmax < gmin:
             continue
 
-        for c_raw in categories:
-            c = dict(c_raw)
-            try:
-                cmin = int(c.get("min_guests", 1))
-                cmax = int(c.get("max_guests", 1))
-            except Exception:
-                continue
-
+        for c, cmin, cmax in parsed_categories:
             low = max(gmin, cmin)
             high = min(gmax, cmax)
             if low <= high:
                 valid.append((g, c, low, high))
 
+    return tuple(valid)
+
+
+def choose_compatible_guest_category_and_count(cfg: dict):
+    guests = cfg.get("guests", [])
+    categories = cfg.get("room_categories", [])
+
+    if not guests:
+        raise ValueError("Config has no guests.")
+    if not categories:
+        raise ValueError("Config has no room_categories.")
+
+    valid = _compat_pairs(json.dumps([guests, categories], sort_keys=True, default=str))
+
     if not valid:
         raise ValueError(
             "No valid guest/category combinations. "
             "Check guest/room min/max in config."
         )
 
-    g, c, low, high = random.choice(valid)
-    guest_count = random.randint(low, high)
+    g, c, low, high = _rng.choice(valid)
+    guest_count = _rng.randint(low, high)
     return g, c, guest_count
 
 
+@lru_cache(maxsize=32)
+def _parse_booking_window(earliest_str: str, latest_str: str) -> tuple[date, int]:
+    earliest = date.fromisoformat(earliest_str)
+    latest = date.fromisoformat(latest_str)
+    if latest < earliest:
+        raise ValueError("booking_window.latest_arrival must be on or after booking_window.earliest_arrival")
+    return earliest, (latest - earliest).days
+
+
 def random_dates(cfg: dict):
     bw = cfg.get("booking_window", {})
     earliest_str = bw.get("earliest_arrival")
@@ -103,70 +125,86 @@ def random_dates(cfg: dict):
             '"booking_window": {"earliest_arrival":"YYYY-MM-DD","latest_arrival":"YYYY-MM-DD"}'
         )
 
-    earliest = date.fromisoformat(earliest_str)
-    latest = date.fromisoformat(latest_str)
-    if latest < earliest:
-        raise ValueError("booking_window.latest_arrival must be on or after booking_window.earliest_arrival")
-
-    delta_days = (latest - earliest).days
-    arrival = earliest + timedelta(days=random.randint(0, delta_days))
+    earliest, delta_days = _parse_booking_window(earliest_str, latest_str)
+    arrival = earliest + timedelta(days=_rng.randint(0, delta_days))
 
     stay = cfg.get("stay_length_nights", {"min": 1, "max": 5})
-    nights = random.randint(int(stay["min"]), int(stay["max"]))
+    nights = _rng.randint(int(stay["min"]), int(stay["max"]))
     departure = arrival + timedelta(days=nights)
     return arrival, departure, nights
 
 
 def format_breakfast_counts(selected_types: list[str]) -> str:
-    counts: dict[str, int] = {}
-    for t in selected_types:
-        counts[t] = counts.get(t, 0) + 1
-    parts = [f"{counts[name]}x {name}" for name in sorted(counts.keys())]
-    return ", ".join(parts)
+    counts = Counter(selected_types)
+    return ", ".join(f"{counts[name]}x {name}" for name in sorted(counts))
 
 
-def generate_breakfast_service(cfg: dict, guest_count: int) -> Optional[str]:
-    policy = cfg.get("breakfast_policy", {})
-    if not bool(policy.get("enabled", False)):
+@lru_cache(maxsize=32)
+def _breakfast_spec(types: tuple, p_any, p_full) -> Optional[tuple[tuple, float, float]]:
+    """(types, p_any, p_full) with clamped probabilities, or None if there are no types."""
+    if not types:
         return None
+    p_any = max(0.0, min(1.0, float(p_any)))
+    p_full = max(0.0, min(1.0, float(p_full)))
+    return types, p_any, p_full
 
-    types = cfg.get("breakfast_types", [])
-    if not types or guest_count <= 0:
+
+def generate_breakfast_service(cfg: dict, guest_count: int) -> Optional[str]:
+    policy = cfg.get("breakfast_policy") or {}
+    if not policy.get("enabled", False) or guest_count <= 0:
         return None
 
-    p_any = float(policy.get("probability_any_breakfast", 0.7))
-    p_full = float(policy.get("probability_full_group_if_any", 0.7))
-    p_any = max(0.0, min(1.0, p_any))
-    p_full = max(0.0, min(1.0, p_full))
+    types = tuple(str(x) for x in cfg.get("breakfast_types", []))
+    try:
+        spec = _breakfast_spec(
+            types,
+            policy.get("probability_any_breakfast", 0.7),
+            policy.get("probability_full_group_if_any", 0.7),
+        )
+    except TypeError:  # unhashable value from a hand-edited config
+        spec = _breakfast_spec(types, 0.7, 0.7)
+    if spec is None:
+        return None
+    types, p_any, p_full = spec
 
-    if random.random() > p_any:
+    if _rng.random() > p_any:
         return None
 
     if guest_count == 1:
         breakfast_count = 1
     else:
-        breakfast_count = guest_count if random.random() <= p_full else random.randint(1, guest_count - 1)
+        breakfast_count = guest_count if _rng.random() <= p_full else _rng.randint(1, guest_count - 1)
 
-    chosen = [random.choice(types) for _ in range(breakfast_count)]
+    chosen = _rng.choices(types, k=breakfast_count)
     return f"{format_breakfast_counts(chosen)}"
 
 
+@lru_cache(maxsize=64)
+def _service_pool(global_services: tuple, category_extras) -> tuple[str, ...]:
+    # Combined pool: globals + room-specific for this room type
+    category_pool = parse_category_extras(list(category_extras) if isinstance(category_extras, tuple) else category_extras)
+    return tuple(unique_keep_order(list(global_services) + category_pool))
+
+
 def generate_scenario(cfg: dict) -> dict:
     guest, category, guests_count = choose_compatible_guest_category_and_count(cfg)
     arrival, departure, nights = random_dates(cfg)
 
     max_services = int(cfg.get("max_services", 3))
     
-    global_pool = list(cfg.get("extra_services", []))
-    category_pool = parse_category_extras(category.get("category_extras", ""))
-    
-    # Combined pool: globals + room-specific for this room type
-    pool = unique_keep_order(global_pool + category_pool)
+    # the pool is built from str() of every entry anyway, so normalize up front to keep the
+    # cache key hashable for hand-edited configs (dicts/lists inside the lists)
+    category_extras = category.get("category_extras", "")
+    if isinstance(category_extras, list):
+        category_extras = tuple(str(x) for x in category_extras)
+    elif not isinstance(category_extras, str):
+        category_extras = ""  # parse_category_extras ignores anything else
+    pool = _service_pool(tuple(str(x) for x in cfg.get("extra_services", [])), category_extras)
     
     max_possible = min(max_services, len(pool))
-    num_services = random.randint(0, max_possible) if max_possible > 0 else 0
+    num_services = _rng.randint(0, max_possible) if max_possible > 0 else 0
     
-    other_services: list[str] = random.sample(pool, k=num_services) if num_services > 0 else []
+    other_services: list[str] = _rng.sample(pool, k=num_services) if num_services > 0 else []
 
 
     breakfast_service = generate_breakfast_service(cfg, guests_count)
@@ -194,25 +232,35 @@ def pick_random_followup(cfg: dict) -> Optional[str]:
     tasks = [t.strip() for t in tasks if isinstance(t, str) and t.strip()]
     if not tasks:
         return None
-    return random.choice(tasks)
+    return _rng.choice(tasks)
 
 
-def should_generate_followup(cfg: dict) -> bool:
-    p = cfg.get("follow_up_probability", 1.0 / 3.0)
+@lru_cache(maxsize=32)
+def _followup_probability(p) -> float:
     try:
         p = float(p)
     except Exception:
         p = 1.0 / 3.0
-    p = max(0.0, min(1.0, p))
-    return random.random() < p
+    return max(0.0, min(1.0, p))
+
+
+def should_generate_followup(cfg: dict) -> bool:
+    p = cfg.get("follow_up_probability", 1.0 / 3.0)
+    try:
+        p = _followup_probability(p)
+    except TypeError:  # unhashable value from a hand-edited config
+        p = 1.0 / 3.0
+    return _rng.random() < p
 
 
 # -------------------- rendering (web/download) --------------------
 
+_WS_RE = re.compile(r"\s+")
+_UNSAFE_FILENAME_RE = re.compile(r"[^A-Za-z0-9._-]")
+
+
 def sanitize_for_filename(text: str) -> str:
-    text = text.strip()
-    text = re.sub(r"\s+", "_", text)
-    text = re.sub(r"[^A-Za-z0-9._-]", "", text)
+    text = _UNSAFE_FILENAME_RE.sub("", _WS_RE.sub("_", text.strip()))
     return text[:40] if text else "UNKNOWN"
 
 def render_task_text(
@@ -221,24 +269,25 @@ def render_task_text(
     generated_id: str,
     followup: Optional[str],
 ) -> str:
-    finished_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    finished_at = time.strftime("%Y-%m-%d %H:%M:%S")
 
-    guest_comment = scenario.get("Guest comment", "")
+    get = scenario.get
+    guest_comment = get("Guest comment", "")
     guest_comment_part = f" | Comment: {guest_comment}" if guest_comment else ""
 
-    lines = [
-        f"PMS TRAINING TASK | ID: {generated_id} | Booking: {booking_number} | Finished: {finished_at}",
-        "",
-        f"Guest: {scenario.get('Guest name','')}{guest_comment_part}",
-        f"Room: {scenario.get('Room category','')}",
-        f"Guests: {scenario.get('Number of guests','')}",
-        f"Arrival: {scenario.get('Arrival','')} | Departure: {scenario.get('Departure','')} | Nights: {scenario.get('Nights','')}",
-        f"Extras: {scenario.get('Extra services','')}",
-    ]
+    text = (
+        f"PMS TRAINING TASK | ID: {generated_id} | Booking: {booking_number} | Finished: {finished_at}\n"
+        "\n"
+        f"Guest: {get('Guest name', '')}{guest_comment_part}\n"
+        f"Room: {get('Room category', '')}\n"
+        f"Guests: {get('Number of guests', '')}\n"
+        f"Arrival: {get('Arrival', '')} | Departure: {get('Departure', '')} | Nights: {get('Nights', '')}\n"
+        f"Extras: {get('Extra services', '')}"
+    )
 
     if followup:
-        lines.append(f"Follow-up: {followup}")
+        text += f"\nFollow-up: {followup}"
 
-    return "\n".join(lines)
+    return text
 
 